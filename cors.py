@@ -0,0 +1,91 @@
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+_ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+# Origin-independent header pairs, built once instead of per response.
+_VARY_ORIGIN = (b"vary", b"Origin")
+_ALLOW_CREDENTIALS = (b"access-control-allow-credentials", b"true")
+_DISALLOWED_BODY = b"Disallowed CORS origin"
+_DISALLOWED_HEADERS = [
+    (b"content-type", b"text/plain; charset=utf-8"),
+    (b"content-length", str(len(_DISALLOWED_BODY)).encode("ascii")),
+    _VARY_ORIGIN,
+]
+
+
+class FastCORS:
+    """Pure-ASGI CORS for an exact-match origin allowlist.
+
+    Equivalent to Starlette's CORSMiddleware with allow_credentials=True and
+    allow_methods/allow_headers="*", minus its per-request Headers/Response
+    objects: origins are compared as raw header bytes against a frozenset,
+    requests without an Origin header pass straight through, and preflights
+    are answered without calling the app.
+    """
+
+    def __init__(self, app: ASGIApp, allow_origins: FrozenSet[bytes], max_age: int = 600) -> None:
+        self.app = app
+        self.allow_origins = allow_origins
+        self.max_age = str(max_age).encode("ascii")
+        self.preflight_headers = [
+            _ALLOW_CREDENTIALS,
+            (b"access-control-allow-methods", _ALLOW_METHODS),
+            (b"access-control-max-age", self.max_age),
+            _VARY_ORIGIN,
+            (b"content-length", b"2"),
+            (b"content-type", b"text/plain; charset=utf-8"),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: Optional[bytes] = None
+        request_method: Optional[bytes] = None
+        request_headers: Optional[bytes] = None
+        for key, value in scope["headers"]:
+            if key == b"origin":
+                origin = value
+            elif key == b"access-control-request-method":
+                request_method = value
+            elif key == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(origin, request_headers, send)
+            return
+
+        # Vary even for disallowed origins: list responses are Cache-Control: public.
+        cors_headers: List[Tuple[bytes, bytes]] = [_VARY_ORIGIN]
+        if origin in self.allow_origins:
+            cors_headers += [(b"access-control-allow-origin", origin), _ALLOW_CREDENTIALS]
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), *cors_headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(self, origin: bytes, request_headers: Optional[bytes], send: Send) -> None:
+        if origin not in self.allow_origins:
+            await send({"type": "http.response.start", "status": 400, "headers": _DISALLOWED_HEADERS})
+            await send({"type": "http.response.body", "body": _DISALLOWED_BODY})
+            return
+
+        headers = [(b"access-control-allow-origin", origin), *self.preflight_headers]
+        if request_headers:
+            headers.append((b"access-control-allow-headers", request_headers))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"OK"})
@@ -1,15 +1,96 @@
 import os
-import psycopg
+from typing import Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from psycopg import AsyncConnection, ProgrammingError
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
 from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+# Supabase's PgBouncer/Supavisor listens here in transaction mode.
+TRANSACTION_POOLER_PORT = 6543
 
-def get_conn():
+
+def _dsn() -> Tuple[str, bool]:
+    """Return (dsn, behind_transaction_pooler)."""
     dsn = os.getenv("DATABASE_URL", "")
     if not dsn:
-        raise RuntimeError("DATABASE_URL is not set")
+        return "", False
+
+    pooled = os.getenv("DB_TRANSACTION_POOLER", "") == "1"
+    if "://" in dsn:
+        parts = urlsplit(dsn)
+        # ?pgbouncer=true is a Prisma-style hint libpq would reject; consume it here.
+        # The raw query string is filtered, not re-encoded: urlencode() would turn
+        # %20 into "+", which libpq does not decode (e.g. in options=-c%20...).
+        params = parts.query.split("&") if parts.query else []
+        if "pgbouncer=true" in params:
+            pooled = True
+            params = [p for p in params if p.partition("=")[0] != "pgbouncer"]
+            dsn = urlunsplit(parts._replace(query="&".join(params)))
+
+    # Parsed the way libpq does, so URIs and "host=... port=..." strings both work.
+    try:
+        info = conninfo_to_dict(dsn)
+    except ProgrammingError:
+        return dsn, pooled  # Let the first connection attempt report it.
+
+    # port may be one value for every host or a comma-separated list (multi-host).
+    if str(TRANSACTION_POOLER_PORT) in str(info.get("port", "")).split(","):
+        pooled = True
 
     # Supabase requires SSL
-    if "sslmode=" not in dsn:
-        joiner = "&" if "?" in dsn else "?"
-        dsn = f"{dsn}{joiner}sslmode=require"
+    if "sslmode" not in info:
+        dsn = make_conninfo(dsn, sslmode="require")
+
+    return dsn, pooled
+
+
+def _pool_max_size() -> int:
+    # min(cpu * 2, db_max_connections / workers): enough connections to keep every
+    # core busy, without letting all uvicorn workers together exceed the server cap.
+    cpus = os.cpu_count() or 1
+    db_max_conn = int(os.getenv("DB_MAX_CONNECTIONS", "60"))
+    workers = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+    return max(2, min(cpus * 2, db_max_conn // workers))
+
+
+DSN, TRANSACTION_POOLER = _dsn()
+POOL_MAX_SIZE = _pool_max_size()
+POOL_MIN_SIZE = min(5, POOL_MAX_SIZE)
+
+# A transaction-mode pooler hands each transaction to any server connection, so
+# statements prepared on one backend are unknown on the next: keep them off there.
+PREPARE_STATEMENTS = not TRANSACTION_POOLER
+
+_conn_kwargs = {
+    # autocommit: every endpoint runs single statements, so there is no COMMIT
+    # round trip holding a connection; multi-statement work opens conn.transaction().
+    "row_factory": dict_row,
+    "autocommit": True,
+    # Direct (or session-mode pooler) connections prepare each statement from its
+    # second execution on: pooled connections live long, so parse/plan is paid
+    # once per shape per connection.
+    "prepare_threshold": 1 if PREPARE_STATEMENTS else None,
+}
+
+
+async def _configure(conn: AsyncConnection) -> None:
+    # Room for every list/insert shape main.py builds, without LRU churn.
+    conn.prepared_max = 200
+
 
-    return psycopg.connect(dsn, row_factory=dict_row)
+# One process-wide pool of warm connections; opened/closed by the FastAPI lifespan
+# in main.py so no request pays the TCP + TLS + auth handshake. Behind Supabase's
+# pooler (port 6543) the layers compose: app pool -> PgBouncer -> Postgres.
+# timeout: a request waits at most 5s for a free connection, then fails with
+# error JSON instead of stalling behind a saturated pool.
+POOL = AsyncConnectionPool(
+    conninfo=DSN,
+    min_size=POOL_MIN_SIZE,
+    max_size=POOL_MAX_SIZE,
+    timeout=5.0,
+    kwargs=_conn_kwargs,
+    configure=_configure,
+    open=False,
+)
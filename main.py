@@ -1,17 +1,46 @@
+import asyncio
+import hashlib
 import os
 import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
 
+import orjson
 import psycopg
+from cachetools import TTLCache
 from psycopg import sql
-from fastapi import FastAPI, Query, Body
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, Query, Body, Header
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.routing import Route
 from pydantic import BaseModel, Field
 
+from cors import FastCORS
+from db import POOL, PREPARE_STATEMENTS
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-app = FastAPI(title="Audit CoE API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DATABASE_URL:
+        # Warm connections are filled in the background. We deliberately don't
+        # POOL.wait(): a timeout there closes the pool for good, and a briefly
+        # unreachable database must not stop the API (or /health) from booting.
+        await POOL.open()
+        try:
+            async with POOL.connection(timeout=5.0) as conn:
+                await _table_column_meta_multi(
+                    conn, [("public", "tasks"), ("public", "audit_runs"), ("public", "task_responses")]
+                )
+        except Exception:
+            pass  # Cold cache: the first request introspects instead.
+    yield
+    await POOL.close()
+
+
+app = FastAPI(title="Audit CoE API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS:
 # - Vercel production frontend
@@ -27,33 +56,51 @@ ALLOWED_ORIGINS = [
     "http://127.0.0.1:4173",
 ]
 
+# ASGI hands Origin over as raw bytes, so the allowlist is matched as bytes too.
+ALLOWED_ORIGINS_B: FrozenSet[bytes] = frozenset(o.encode("ascii") for o in ALLOWED_ORIGINS)
+
+# Credentials allowed; any method/header. See cors.FastCORS.
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    FastCORS,
+    allow_origins=ALLOWED_ORIGINS_B,
+    # Let browsers cache preflights for a day instead of sending an OPTIONS per call.
+    max_age=86400,
 )
 
 
-def _db() -> psycopg.Connection:
+def _db() -> AsyncContextManager[psycopg.AsyncConnection]:
+    """Borrow a warm connection from the process-wide pool (returned on exit)."""
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL not set")
-    return psycopg.connect(DATABASE_URL)
+    return POOL.connection()
 
 
-def _table_columns(conn: psycopg.Connection, table: str, schema: str = "public") -> List[str]:
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = %(schema)s AND table_name = %(table)s
-            ORDER BY ordinal_position;
-            """,
-            {"schema": schema, "table": table},
-        )
-        return [r[0] for r in cur.fetchall()]
+# information_schema lookups per (schema, table). Columns change at deploy time,
+# not request time, so results are kept for SCHEMA_CACHE_TTL seconds (or until
+# /debug/columns?refresh=1). The lock makes concurrent misses query only once.
+SCHEMA_CACHE_TTL = 300
+_META_CACHE: TTLCache = TTLCache(maxsize=128, ttl=SCHEMA_CACHE_TTL)
+_SCHEMA_CACHE_LOCK = asyncio.Lock()
+
+
+async def _table_columns(
+    conn: psycopg.AsyncConnection, table: str, schema: str = "public", refresh: bool = False
+) -> List[str]:
+    """Column names in ordinal order, read from the cached column metadata."""
+    key = (schema, table)
+    if refresh:
+        _META_CACHE.pop(key, None)
+    metas = await _table_column_meta_multi(conn, [key])
+    return list(metas[key])
+
+
+def _binary_safe(meta: Dict[str, Dict[str, Any]], cols: List[str]) -> bool:
+    """True if every column decodes natively from the binary wire format.
+
+    psycopg returns raw bytes for types it has no loader for (enums, extension
+    types, arrays of those), so queries touching them stay in text format.
+    """
+    return all(meta.get(c, {}).get("data_type") not in ("USER-DEFINED", "ARRAY") for c in cols)
 
 
 def _select_intersection(existing: List[str], desired: List[str]) -> List[str]:
@@ -75,14 +122,6 @@ def _select_intersection(existing: List[str], desired: List[str]) -> List[str]:
 # All endpoints return structured error JSON on failure.
 # ---------------------------------------------------------------------------
 
-def _is_uuid(value: str) -> bool:
-    try:
-        uuid.UUID(str(value))
-        return True
-    except Exception:
-        return False
-
-
 def _err(code: str, detail: str, **extra: Any) -> Dict[str, Any]:
     out: Dict[str, Any] = {"error": code, "detail": detail}
     if extra:
@@ -90,148 +129,445 @@ def _err(code: str, detail: str, **extra: Any) -> Dict[str, Any]:
     return out
 
 
-def _table_column_meta(conn: psycopg.Connection, table: str, schema: str = "public") -> Dict[str, Dict[str, Any]]:
-    """Return column metadata keyed by column_name, using information_schema."""
-    with conn.cursor() as cur:
-        cur.execute(
+async def _table_column_meta_multi(
+    conn: psycopg.AsyncConnection, tables: List[Tuple[str, str]]
+) -> Dict[Tuple[str, str], Dict[str, Dict[str, Any]]]:
+    """Column metadata keyed by column_name for several (schema, table) pairs.
+
+    Served from _META_CACHE when possible, and all misses share one
+    information_schema query. Callers must treat the results as read-only.
+    """
+    out: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+    for key in tables:
+        cached = _META_CACHE.get(key)
+        if cached is not None:
+            out[key] = cached
+
+    misses = [key for key in tables if key not in out]
+    if not misses:
+        return out
+
+    async with _SCHEMA_CACHE_LOCK:
+        # Whoever held the lock before us may have just filled some of these.
+        for key in misses:
+            cached = _META_CACHE.get(key)
+            if cached is not None:
+                out[key] = cached
+        misses = [key for key in misses if key not in out]
+        if not misses:
+            return out
+
+        cur = await conn.execute(
             """
             SELECT
+              table_schema,
+              table_name,
               column_name,
               is_nullable,
               column_default,
               data_type,
               udt_name
             FROM information_schema.columns
-            WHERE table_schema = %(schema)s AND table_name = %(table)s
-            ORDER BY ordinal_position;
+            WHERE (table_schema, table_name) IN (
+              SELECT * FROM unnest(%(schemas)s::text[], %(tables)s::text[])
+            )
+            ORDER BY table_schema, table_name, ordinal_position;
             """,
-            {"schema": schema, "table": table},
+            {"schemas": [k[0] for k in misses], "tables": [k[1] for k in misses]},
         )
-        meta: Dict[str, Dict[str, Any]] = {}
-        for (name, is_nullable, column_default, data_type, udt_name) in cur.fetchall():
-            meta[name] = {
-                "is_nullable": is_nullable,
-                "column_default": column_default,
-                "data_type": data_type,
-                "udt_name": udt_name,
-            }
-        return meta
-
-
-def _pick_first(existing: set, candidates: List[str]) -> Optional[str]:
+        found: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        for r in await cur.fetchall():
+            key = (r.pop("table_schema"), r.pop("table_name"))
+            found.setdefault(key, {})[r.pop("column_name")] = r
+        # Missing tables are not cached: they may be created without a redeploy.
+        for key, meta in found.items():
+            _META_CACHE[key] = meta
+
+    for key in misses:
+        out[key] = found.get(key, {})
+    return out
+
+
+def _pick_first(existing: set, candidates: Tuple[str, ...]) -> Optional[str]:
     for c in candidates:
         if c in existing:
             return c
     return None
 
 
-def _missing_required_columns(meta: Dict[str, Dict[str, Any]], provided: set) -> List[str]:
-    missing = []
-    for col, m in meta.items():
-        if col in provided:
-            continue
-        if m.get("is_nullable") == "NO" and not m.get("column_default"):
-            # If it's required and there's no default, we must provide it.
-            missing.append(col)
-    return missing
+# Rendered SQL keyed by statement shape (table, columns, active filters, order
+# column). Column lists only change on deploy, so each shape is composed once
+# and later requests reuse the SQL string as-is.
+_QUERY_CACHE: Dict[Tuple[Any, ...], str] = {}
+
+
+def _audit_runs_query(select_cols: Tuple[str, ...], with_account: bool, order_col: str) -> str:
+    key = ("audit_runs", select_cols, with_account, order_col)
+    query = _QUERY_CACHE.get(key)
+    if query is None:
+        query = sql.SQL("""
+            SELECT {select_cols}
+            FROM {table}
+            {where_clause}
+            ORDER BY {order_col} DESC
+            LIMIT %(limit)s;
+        """).format(
+            select_cols=sql.SQL(", ").join(sql.Identifier(c) for c in select_cols),
+            table=sql.Identifier("audit_runs"),
+            where_clause=sql.SQL("WHERE account_id = %(account_id)s") if with_account else sql.SQL(""),
+            order_col=sql.Identifier(order_col),
+        ).as_string(None)
+        _QUERY_CACHE[key] = query
+    return query
+
+
+def _tasks_query(
+    select_cols: Tuple[str, ...],
+    with_run: bool,
+    with_status: bool,
+    account_via: Optional[str],
+    order_col: str,
+    keyset: bool = False,
+    with_cursor: bool = False,
+) -> str:
+    """account_via: None (no account filter), "tasks" (t.account_id) or "audit_runs" (join).
+
+    keyset orders by (created_at, id) so pages are stable; with_cursor then
+    resumes strictly after the given row via an index range scan.
+    """
+    key = ("tasks", select_cols, with_run, with_status, account_via, order_col, keyset, with_cursor)
+    query = _QUERY_CACHE.get(key)
+    if query is None:
+        where_parts = []
+        join_sql = sql.SQL("")
+
+        if with_run:
+            where_parts.append(sql.SQL("t.audit_run_id = %(audit_run_id)s"))
+
+        if with_status:
+            where_parts.append(sql.SQL("t.status = %(status)s"))
+
+        if account_via == "tasks":
+            where_parts.append(sql.SQL("t.account_id = %(account_id)s"))
+        elif account_via == "audit_runs":
+            join_sql = sql.SQL("JOIN {runs} r ON r.id = t.audit_run_id").format(runs=sql.Identifier("audit_runs"))
+            where_parts.append(sql.SQL("r.account_id = %(account_id)s"))
+
+        if keyset and with_cursor:
+            where_parts.append(sql.SQL("(t.created_at, t.id) < (%(cursor_created_at)s, %(cursor_id)s)"))
+
+        # The audit_run_id and status filters each lead an index continuing with
+        # (created_at DESC, id DESC) (see migrations/), so this ORDER BY is read
+        # straight off the index. account_id is not indexed on tasks, and the
+        # audit_runs join filters on r.account_id, so both still sort.
+        order_sql = sql.SQL("t.{} DESC").format(sql.Identifier(order_col))
+        if keyset:
+            order_sql = sql.SQL("t.created_at DESC, t.id DESC")
+
+        query = sql.SQL("""
+            SELECT {select_cols}
+            FROM {tasks} t
+            {join_clause}
+            {where_clause}
+            ORDER BY {order_by}
+            LIMIT %(limit)s;
+        """).format(
+            select_cols=sql.SQL(", ").join(sql.SQL("t.") + sql.Identifier(c) for c in select_cols),
+            tasks=sql.Identifier("tasks"),
+            join_clause=join_sql,
+            where_clause=sql.SQL("WHERE ") + sql.SQL(" AND ").join(where_parts) if where_parts else sql.SQL(""),
+            order_by=order_sql,
+        ).as_string(None)
+        _QUERY_CACHE[key] = query
+    return query
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _wants_ndjson(accept: Optional[str]) -> bool:
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+# /tasks pages at least this large are streamed by _json_list_response. That is
+# only the maximum page: streamed bodies skip the response cache and ETag, and
+# hold a pooled connection for the whole download, so common page sizes keep
+# the one-piece (cached) form.
+STREAM_JSON_MIN_LIMIT = 1000
+STREAM_FETCH_SIZE = 128
+
+
+async def _open_list_stream(
+    query: str, params: Dict[str, Any]
+) -> Tuple[AsyncExitStack, psycopg.AsyncServerCursor, List[Dict[str, Any]]]:
+    """Borrow a connection, DECLARE a server-side cursor and fetch the first batch.
+
+    Streaming endpoints call this before returning their StreamingResponse, so
+    pool timeouts and query errors raise into the handler's error handling
+    instead of escaping after the 200 headers. The caller owns the returned
+    stack (connection, transaction, cursor) and must close it.
+    """
+    stack = AsyncExitStack()
+    try:
+        conn = await stack.enter_async_context(_db())
+        # DECLARE needs a transaction block; pooled connections are autocommit.
+        await stack.enter_async_context(conn.transaction())
+        cur = await stack.enter_async_context(conn.cursor(name="list_stream"))
+        await cur.execute(query, params)
+        first = await cur.fetchmany(STREAM_FETCH_SIZE)
+    except BaseException:
+        await stack.aclose()
+        raise
+    return stack, cur, first
+
+
+async def _close_list_stream(stack: AsyncExitStack) -> None:
+    try:
+        await stack.aclose()
+    except Exception:
+        pass  # A broken connection is discarded by the pool on return.
+
+
+async def _ndjson_response(query: str, params: Dict[str, Any], error_code: str) -> StreamingResponse:
+    """Stream one JSON line per row as batches arrive, without materializing the result list.
+
+    If a later batch fails, the last line is the usual error object.
+    """
+    stack, cur, first = await _open_list_stream(query, params)
+
+    async def body() -> AsyncIterator[bytes]:
+        error: Optional[Dict[str, Any]] = None
+        try:
+            rows = first
+            while rows:
+                # orjson encodes UUID/datetime natively; str() only catches Decimal & co.
+                yield b"".join(orjson.dumps(row, default=str, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+                rows = await cur.fetchmany(STREAM_FETCH_SIZE)
+        except Exception as e:
+            error = _err(error_code, str(e))
+        finally:
+            await _close_list_stream(stack)
+        if error is not None:
+            yield orjson.dumps(error, option=orjson.OPT_APPEND_NEWLINE)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _json_list_response(
+    query: str, params: Dict[str, Any], select_cols: List[str], keyset: bool, limit: int
+) -> StreamingResponse:
+    """Stream the usual /tasks body ({"items": [...], ...}) from a server-side cursor.
+
+    Batches are encoded as they arrive; neither the result set nor the body is
+    ever held whole. count and next_cursor follow items since they are only
+    known once rows run out.
+    """
+    stack, cur, first = await _open_list_stream(query, params)
+
+    async def body() -> AsyncIterator[bytes]:
+        count = 0
+        trailer: Dict[str, Any] = {"count": 0, "selected_columns": select_cols, "next_cursor": None}
+        try:
+            yield b'{"items":['
+            rows = first
+            while rows:
+                chunk = b",".join(orjson.dumps(row, default=str) for row in rows)
+                yield b"," + chunk if count else chunk
+                count += len(rows)
+                trailer["count"] = count
+                if keyset and count == limit:
+                    trailer["next_cursor"] = {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+                rows = await cur.fetchmany(STREAM_FETCH_SIZE)
+        except Exception as e:
+            # Headers are already sent: end the body as valid JSON carrying the
+            # error next to the rows that made it out.
+            trailer.update(next_cursor=None, error="tasks_query_failed", detail=str(e))
+        finally:
+            await _close_list_stream(stack)
+        # Splice the trailer's fields into the open object: '],"count":...}'.
+        yield b"]," + orjson.dumps(trailer, default=str)[1:]
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+BATCH_MAX_REQUESTS = 20
+BULK_MAX_RESPONSES = 500
+
+
+# Short-lived cache of rendered list responses keyed by endpoint + query params.
+# Lists tolerate a few seconds of staleness, so repeat requests skip Postgres and
+# the ETag lets the frontend revalidate with a bodyless 304.
+# Bounded by body bytes, not entry count: keyset paging makes a new key per page
+# and a /tasks body can be ~1 MB, so a count cap alone could pin hundreds of MB
+# per worker. Bodies too big for their share of the budget are not cached.
+RESPONSE_CACHE_TTL = 5
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+_RESPONSE_CACHE_MAX_ENTRY_BYTES = RESPONSE_CACHE_MAX_BYTES // 16
+_RESPONSE_CACHE: TTLCache = TTLCache(
+    maxsize=RESPONSE_CACHE_MAX_BYTES, ttl=RESPONSE_CACHE_TTL, getsizeof=lambda hit: len(hit[0])
+)
+
+
+def _list_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    headers = {"Cache-Control": f"public, max-age={RESPONSE_CACHE_TTL}", "ETag": etag}
+    if if_none_match and etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _cached_list_response(key: Tuple[Any, ...], if_none_match: Optional[str]) -> Optional[Response]:
+    hit = _RESPONSE_CACHE.get(key)
+    if hit is None:
+        return None
+    return _list_response(hit[0], hit[1], if_none_match)
+
+
+def _store_list_response(key: Tuple[Any, ...], payload: Dict[str, Any], if_none_match: Optional[str]) -> Response:
+    body = orjson.dumps(payload, default=str)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    if len(body) <= _RESPONSE_CACHE_MAX_ENTRY_BYTES:
+        # TTLCache drops expired entries first, then least recently used ones.
+        _RESPONSE_CACHE[key] = (body, etag)
+    return _list_response(body, etag, if_none_match)
 
 
 class TaskResponseIn(BaseModel):
-    task_id: str = Field(..., description="Task UUID")
+    task_id: uuid.UUID = Field(..., description="Task UUID")
     response_text: Optional[str] = Field(default=None, description="Free-text response")
     response_type: Optional[str] = Field(default=None, description="text|yes_no|number|file_placeholder")
     value_bool: Optional[bool] = Field(default=None)
     value_number: Optional[float] = Field(default=None)
-    user_id: Optional[str] = Field(default=None, description="Responder user UUID (optional if DB allows)")
+    user_id: Optional[uuid.UUID] = Field(default=None, description="Responder user UUID (optional if DB allows)")
+
 
+class BatchRequestItem(BaseModel):
+    id: str = Field(..., description="Caller-chosen id, echoed back on the matching response")
+    url: str = Field(..., description="Path plus query string, e.g. /tasks?status=open")
+    method: str = Field(default="GET")
+    body: Optional[Any] = Field(default=None, description="JSON body for POST sub-requests")
+
+
+class BatchIn(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1, max_length=BATCH_MAX_REQUESTS)
+
+
+# Constant bodies, encoded once at import. /health also sends one shared header
+# list on every call; that is safe because FastCORS adds its headers to a copy
+# of the start message instead of appending to the list. /debug/db still wraps
+# its body in a fresh Response per call, since Response instances are mutable.
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+_NO_DATABASE_URL_BODY = orjson.dumps({"status": "error", "detail": "DATABASE_URL not set"})
+_HEALTH_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_HEALTH_BODY)).encode("ascii")),
+]
 
-@app.get("/health")
-def health() -> Dict[str, Any]:
-    return {"status": "ok"}
+
+class _HealthApp:
+    """GET /health as a bare ASGI app.
+
+    Probes hit this every few seconds, so it skips FastAPI's dependency
+    resolution and response serialization and sends the constant body itself.
+    """
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": _HEALTH_HEADERS})
+        await send({"type": "http.response.body", "body": _HEALTH_BODY})
+
+
+# A class instance, not a function, so Starlette mounts it as raw ASGI.
+app.router.routes.insert(0, Route("/health", _HealthApp(), methods=["GET"], include_in_schema=False))
 
 
 @app.get("/debug/db")
-def debug_db() -> Dict[str, Any]:
+async def debug_db() -> Dict[str, Any]:
     if not DATABASE_URL:
-        return {"status": "error", "detail": "DATABASE_URL not set"}
+        return Response(content=_NO_DATABASE_URL_BODY, media_type="application/json")
 
     try:
-        with _db() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) FROM accounts;")
-                accounts = cur.fetchone()[0]
+        async with _db() as conn:
+            cur = await conn.execute("SELECT COUNT(*) AS accounts FROM accounts;")
+            accounts = (await cur.fetchone())["accounts"]
         return {"status": "success", "message": "Connected to Postgres", "accounts": accounts}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
 
 
 @app.get("/debug/columns")
-def debug_columns(
+async def debug_columns(
     table: str = Query(..., description="Table name (e.g., tasks, audit_runs)"),
     schema: str = Query(default="public", description="Schema name (default: public)"),
+    refresh: bool = Query(default=False, description="Bypass and repopulate the cached column metadata"),
 ) -> Dict[str, Any]:
     try:
-        with _db() as conn:
-            cols = _table_columns(conn, table=table, schema=schema)
+        async with _db() as conn:
+            cols = await _table_columns(conn, table=table, schema=schema, refresh=refresh)
         return {"schema": schema, "table": table, "columns": cols, "count": len(cols)}
     except Exception as e:
         return {"error": "debug_columns_failed", "detail": str(e)}
 
 
 @app.get("/audit-runs")
-def list_audit_runs(
-    account_id: Optional[str] = Query(default=None, description="Filter by account UUID"),
+async def list_audit_runs(
+    account_id: Optional[uuid.UUID] = Query(default=None, description="Filter by account UUID"),
     limit: int = Query(default=50, ge=1, le=500),
+    accept: Optional[str] = Header(default=None, include_in_schema=False),
+    if_none_match: Optional[str] = Header(default=None, include_in_schema=False),
 ) -> Dict[str, Any]:
     desired = ["id", "account_id", "template_id", "status", "started_at", "due_at", "created_at"]
+    cache_key = ("audit_runs", account_id, limit)
+    if not _wants_ndjson(accept):
+        cached = _cached_list_response(cache_key, if_none_match)
+        if cached is not None:
+            return cached
+
     try:
-        with _db() as conn:
-            cols = _table_columns(conn, "audit_runs")
+        async with _db() as conn:
+            run_meta = (await _table_column_meta_multi(conn, [("public", "audit_runs")]))[("public", "audit_runs")]
+            cols = list(run_meta)
             select_cols = _select_intersection(cols, desired)
             if not select_cols:
                 return {"error": "audit_runs_no_known_columns", "detail": f"Found columns: {cols}"}
 
-            select_sql = sql.SQL(", ").join(sql.Identifier(c) for c in select_cols)
-
-            where_parts = []
             params: Dict[str, Any] = {"limit": limit}
-            if account_id and "account_id" in cols:
-                where_parts.append(sql.SQL("account_id = %(account_id)s"))
+            with_account = bool(account_id and "account_id" in cols)
+            if with_account:
                 params["account_id"] = account_id
 
-            where_sql = sql.SQL("WHERE ") + sql.SQL(" AND ").join(where_parts) if where_parts else sql.SQL("")
-
             order_col = "created_at" if "created_at" in cols else select_cols[0]
+            query = _audit_runs_query(tuple(select_cols), with_account, order_col)
+
+            # NDJSON streams on a connection borrowed once this one is back in the pool.
+            ndjson = _wants_ndjson(accept)
+            if not ndjson:
+                # Hot query: prepare it server-side so pooled connections skip
+                # parse/plan on repeat calls (off behind a transaction-mode pooler, see db.py),
+                # and read results in binary format when every column has a native loader.
+                cur = await conn.execute(
+                    query, params, prepare=PREPARE_STATEMENTS, binary=_binary_safe(run_meta, select_cols)
+                )
+                rows = await cur.fetchall()
 
-            query = sql.SQL("""
-                SELECT {select_cols}
-                FROM {table}
-                {where_clause}
-                ORDER BY {order_col} DESC
-                LIMIT %(limit)s;
-            """).format(
-                select_cols=select_sql,
-                table=sql.Identifier("audit_runs"),
-                where_clause=where_sql,
-                order_col=sql.Identifier(order_col),
-            )
-
-            with conn.cursor() as cur:
-                cur.execute(query, params)
-                out_cols = [d[0] for d in cur.description]
-                rows = [dict(zip(out_cols, r)) for r in cur.fetchall()]
+        if ndjson:
+            return await _ndjson_response(query, params, "audit_runs_query_failed")
 
-        return {"items": rows, "count": len(rows), "selected_columns": select_cols}
+        return _store_list_response(
+            cache_key, {"items": rows, "count": len(rows), "selected_columns": select_cols}, if_none_match
+        )
     except Exception as e:
         return {"error": "audit_runs_query_failed", "detail": str(e)}
 
 
 @app.get("/tasks")
-def list_tasks(
-    audit_run_id: Optional[str] = Query(default=None, description="Filter by audit_run UUID"),
-    account_id: Optional[str] = Query(default=None, description="Filter by account UUID (via join if needed)"),
+async def list_tasks(
+    audit_run_id: Optional[uuid.UUID] = Query(default=None, description="Filter by audit_run UUID"),
+    account_id: Optional[uuid.UUID] = Query(default=None, description="Filter by account UUID (via join if needed)"),
     status: Optional[str] = Query(default=None, description="Filter by task status"),
     limit: int = Query(default=200, ge=1, le=1000),
+    cursor_created_at: Optional[datetime] = Query(default=None, description="Keyset cursor: next_cursor.created_at"),
+    cursor_id: Optional[uuid.UUID] = Query(default=None, description="Keyset cursor: next_cursor.id"),
+    accept: Optional[str] = Header(default=None, include_in_schema=False),
+    if_none_match: Optional[str] = Header(default=None, include_in_schema=False),
 ) -> Dict[str, Any]:
     desired = [
         "id",
@@ -244,39 +580,50 @@ def list_tasks(
         "due_at",
         "created_at",
     ]
+    with_cursor = cursor_created_at is not None or cursor_id is not None
+    if with_cursor and (cursor_created_at is None or cursor_id is None):
+        return _err("invalid_cursor", "cursor_created_at and cursor_id must be provided together")
+
+    cache_key = ("tasks", audit_run_id, account_id, status, limit, cursor_created_at, cursor_id)
+    if not _wants_ndjson(accept):
+        cached = _cached_list_response(cache_key, if_none_match)
+        if cached is not None:
+            return cached
 
     try:
-        with _db() as conn:
-            task_cols = _table_columns(conn, "tasks")
-            run_cols = _table_columns(conn, "audit_runs")
+        async with _db() as conn:
+            # audit_runs only matters for the account_id join, so leave it out of
+            # the (cold-cache) introspection query unless that filter is present.
+            tables = [("public", "tasks")]
+            if account_id:
+                tables.append(("public", "audit_runs"))
+            metas = await _table_column_meta_multi(conn, tables)
+            task_meta = metas[("public", "tasks")]
+            task_cols = list(task_meta)
 
             select_cols = _select_intersection(task_cols, desired)
             if not select_cols:
                 return {"error": "tasks_no_known_columns", "detail": f"Found columns: {task_cols}"}
 
             params: Dict[str, Any] = {"limit": limit}
-            where_parts = []
-            join_sql = sql.SQL("")
-            from_sql = sql.SQL("{tasks} t").format(tasks=sql.Identifier("tasks"))
+            account_via: Optional[str] = None
 
-            if audit_run_id and "audit_run_id" in task_cols:
-                where_parts.append(sql.SQL("t.audit_run_id = %(audit_run_id)s"))
+            with_run = bool(audit_run_id and "audit_run_id" in task_cols)
+            if with_run:
                 params["audit_run_id"] = audit_run_id
 
-            if status and "status" in task_cols:
-                where_parts.append(sql.SQL("t.status = %(status)s"))
+            with_status = bool(status and "status" in task_cols)
+            if with_status:
                 params["status"] = status
 
             if account_id:
                 if "account_id" in task_cols:
-                    where_parts.append(sql.SQL("t.account_id = %(account_id)s"))
+                    account_via = "tasks"
                     params["account_id"] = account_id
                 else:
+                    run_cols = list(metas[("public", "audit_runs")])
                     if "audit_run_id" in task_cols and "id" in run_cols and "account_id" in run_cols:
-                        join_sql = sql.SQL("JOIN {runs} r ON r.id = t.audit_run_id").format(
-                            runs=sql.Identifier("audit_runs")
-                        )
-                        where_parts.append(sql.SQL("r.account_id = %(account_id)s"))
+                        account_via = "audit_runs"
                         params["account_id"] = account_id
                     else:
                         return {
@@ -286,180 +633,491 @@ def list_tasks(
                             "audit_runs_columns": run_cols,
                         }
 
-            select_sql = sql.SQL(", ").join(sql.SQL("t.") + sql.Identifier(c) for c in select_cols)
-            where_sql = sql.SQL("WHERE ") + sql.SQL(" AND ").join(where_parts) if where_parts else sql.SQL("")
             order_col = "created_at" if "created_at" in task_cols else select_cols[0]
 
-            query = sql.SQL("""
-                SELECT {select_cols}
-                FROM {from_clause}
-                {join_clause}
-                {where_clause}
-                ORDER BY t.{order_col} DESC
-                LIMIT %(limit)s;
-            """).format(
-                select_cols=select_sql,
-                from_clause=from_sql,
-                join_clause=join_sql,
-                where_clause=where_sql,
-                order_col=sql.Identifier(order_col),
+            # Keyset pagination needs a unique, indexed sort key: (created_at, id).
+            keyset = "created_at" in select_cols and "id" in select_cols
+            if with_cursor:
+                if not keyset:
+                    return _err("invalid_cursor", "tasks needs created_at and id columns for cursor pagination")
+                params["cursor_created_at"] = cursor_created_at
+                params["cursor_id"] = cursor_id
+
+            query = _tasks_query(
+                tuple(select_cols), with_run, with_status, account_via, order_col, keyset, with_cursor
             )
+            # NDJSON and maximum-size pages stream (uncached, no ETag), on a
+            # connection borrowed once this one is back in the pool.
+            ndjson = _wants_ndjson(accept)
+            stream = ndjson or limit >= STREAM_JSON_MIN_LIMIT
+            if not stream:
+                cur = await conn.execute(
+                    query, params, prepare=PREPARE_STATEMENTS, binary=_binary_safe(task_meta, select_cols)
+                )
+                rows = await cur.fetchall()
 
-            with conn.cursor() as cur:
-                cur.execute(query, params)
-                out_cols = [d[0] for d in cur.description]
-                rows = [dict(zip(out_cols, r)) for r in cur.fetchall()]
+        if ndjson:
+            return await _ndjson_response(query, params, "tasks_query_failed")
+        if stream:
+            return await _json_list_response(query, params, select_cols, keyset, limit)
 
-        return {"items": rows, "count": len(rows), "selected_columns": select_cols}
+        next_cursor = None
+        if keyset and len(rows) == limit:
+            next_cursor = {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+
+        return _store_list_response(
+            cache_key,
+            {"items": rows, "count": len(rows), "selected_columns": select_cols, "next_cursor": next_cursor},
+            if_none_match,
+        )
     except Exception as e:
         return {"error": "tasks_query_failed", "detail": str(e)}
 
 
+# Candidate task_responses columns per TaskResponseIn field, most specific first.
+_TASK_RESPONSE_COLUMN_CANDIDATES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("task_id", ("task_id", "tasks_id", "task_uuid")),
+    ("user_id", ("user_id", "responder_user_id", "created_by_user_id", "created_by", "owner_user_id")),
+    ("response_text", ("response_text", "text", "comment", "response", "answer_text")),
+    ("response_type", ("response_type", "type")),
+    ("value_bool", ("value_bool", "bool_value", "response_bool")),
+    ("value_number", ("value_number", "number_value", "response_number")),
+)
+
+# Common autogenerated columns, allowed even if metadata looks strict.
+# (Some schemas use generated columns or triggers not visible as defaults.)
+_AUTOGENERATED_COLUMNS = frozenset({"id", "created_at", "updated_at"})
+
+
+class _TaskResponseColumns(NamedTuple):
+    col_map: Dict[str, Optional[str]]
+    required: Tuple[str, ...]
+    returning: Tuple[str, ...]
+
+
+# Resolved columns for the current task_responses metadata snapshot. The entry
+# holds the metadata dict it came from; a refreshed snapshot is a new dict, so
+# the identity check re-resolves once per schema change instead of per request.
+_TASK_RESPONSE_COLUMNS: Dict[Tuple[str, str], Tuple[Dict[str, Dict[str, Any]], _TaskResponseColumns]] = {}
+
+
+def _task_response_columns(tr_meta: Dict[str, Dict[str, Any]]) -> _TaskResponseColumns:
+    """Map TaskResponseIn fields to task_responses columns, plus the required and RETURNING columns."""
+    hit = _TASK_RESPONSE_COLUMNS.get(("public", "task_responses"))
+    if hit is not None and hit[0] is tr_meta:
+        return hit[1]
+
+    tr_cols = set(tr_meta)
+    resolved = _TaskResponseColumns(
+        col_map={field: _pick_first(tr_cols, candidates) for field, candidates in _TASK_RESPONSE_COLUMN_CANDIDATES},
+        # Required = NOT NULL without a default, so an insert must provide it.
+        required=tuple(
+            col
+            for col, m in tr_meta.items()
+            if m.get("is_nullable") == "NO" and not m.get("column_default") and col not in _AUTOGENERATED_COLUMNS
+        ),
+        returning=tuple(c for c in ("id", "task_id", "created_at") if c in tr_cols),
+    )
+    _TASK_RESPONSE_COLUMNS[("public", "task_responses")] = (tr_meta, resolved)
+    return resolved
+
+
+def _task_response_row(payload: TaskResponseIn, col_map: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Build the task_responses insert dict for one payload (task FK column must be resolved)."""
+    # Bound as str: psycopg sends those untyped, so the server casts them to
+    # whatever type the FK/user columns actually have (uuid or text).
+    row: Dict[str, Any] = {col_map["task_id"]: str(payload.task_id)}
+
+    if col_map["user_id"] and payload.user_id:
+        row[col_map["user_id"]] = str(payload.user_id)
+
+    if col_map["response_text"] and payload.response_text is not None:
+        row[col_map["response_text"]] = payload.response_text
+
+    if col_map["response_type"] and payload.response_type is not None:
+        row[col_map["response_type"]] = payload.response_type
+
+    if col_map["value_bool"] and payload.value_bool is not None:
+        row[col_map["value_bool"]] = payload.value_bool
+
+    if col_map["value_number"] and payload.value_number is not None:
+        row[col_map["value_number"]] = payload.value_number
+
+    return row
+
+
+def _missing_insert_columns(tr_columns: _TaskResponseColumns, provided: Dict[str, Any]) -> List[str]:
+    """Required task_responses columns (no default) that an insert would leave empty."""
+    return [c for c in tr_columns.required if c not in provided]
+
+
+# Values written to tasks after a response is saved. Both are SQL, not bound
+# parameters: NOW() is the statement's transaction timestamp, read server-side.
+_TASK_UPDATE_VALUES: Dict[str, sql.Composable] = {
+    "responded_at": sql.SQL("NOW()"),
+    "status": sql.Literal("responded"),
+}
+
+
+def _task_update_cols(t_meta: Dict[str, Dict[str, Any]]) -> Tuple[str, ...]:
+    """Best-effort task update (defensive) applied after a response is saved."""
+    update_cols: List[str] = []
+    # Set responded_at if present.
+    if "responded_at" in t_meta:
+        update_cols.append("responded_at")
+
+    # Only set status if it's not USER-DEFINED (enum-like).
+    if "status" in t_meta:
+        status_meta = t_meta.get("status") or {}
+        if status_meta.get("data_type") != "USER-DEFINED":
+            update_cols.append("status")
+    return tuple(update_cols)
+
+
+def _task_update_set_sql(update_cols: Tuple[str, ...]) -> sql.Composable:
+    return sql.SQL(", ").join(
+        sql.SQL("{col} = {val}").format(col=sql.Identifier(k), val=_TASK_UPDATE_VALUES[k]) for k in update_cols
+    )
+
+
+def _task_response_query(
+    insert_cols: Tuple[str, ...], returning_cols: Tuple[str, ...], update_cols: Tuple[str, ...]
+) -> str:
+    """Fused check + insert + update for one task response, memoized per column shape."""
+    key = ("task_response", insert_cols, returning_cols, update_cols)
+    query = _QUERY_CACHE.get(key)
+    if query is None:
+        update_cte = sql.SQL("")
+        if update_cols:
+            update_cte = sql.SQL(", upd AS (UPDATE {table} SET {set_sql} WHERE id IN (SELECT id FROM task))").format(
+                table=sql.Identifier("tasks"),
+                set_sql=_task_update_set_sql(update_cols),
+            )
+
+        query = sql.SQL("""
+            WITH task AS (
+                SELECT id FROM {tasks} WHERE id = %(task_id)s LIMIT 1
+            ), ins AS (
+                INSERT INTO {table} ({cols})
+                SELECT {vals} FROM task
+                {returning}
+            ){update_cte}
+            SELECT EXISTS (SELECT 1 FROM task) AS task_found{out_cols}
+            FROM (SELECT 1) AS one
+            {join_ins};
+        """).format(
+            tasks=sql.Identifier("tasks"),
+            table=sql.Identifier("task_responses"),
+            cols=sql.SQL(", ").join(sql.Identifier(c) for c in insert_cols),
+            vals=sql.SQL(", ").join(sql.Placeholder(c) for c in insert_cols),
+            returning=(
+                sql.SQL("RETURNING ") + sql.SQL(", ").join(sql.Identifier(c) for c in returning_cols)
+                if returning_cols
+                else sql.SQL("")
+            ),
+            update_cte=update_cte,
+            out_cols=sql.SQL("").join(sql.SQL(", ins.") + sql.Identifier(c) for c in returning_cols),
+            join_ins=sql.SQL("LEFT JOIN ins ON true") if returning_cols else sql.SQL(""),
+        ).as_string(None)
+        _QUERY_CACHE[key] = query
+    return query
+
+
+def _task_responses_bulk_query(
+    typed_cols: Tuple[Tuple[str, str], ...],
+    task_fk_col: str,
+    returning_cols: Tuple[str, ...],
+    update_cols: Tuple[str, ...],
+) -> str:
+    """unnest()-based bulk insert + update; typed_cols pairs each column with its udt_name."""
+    key = ("task_responses_bulk", typed_cols, task_fk_col, returning_cols, update_cols)
+    query = _QUERY_CACHE.get(key)
+    if query is None:
+        update_cte = sql.SQL("")
+        if update_cols:
+            update_cte = sql.SQL("""
+                , upd AS (
+                    UPDATE {table} SET {set_sql}
+                    WHERE id IN (SELECT {fk} FROM data) AND NOT EXISTS (SELECT 1 FROM missing)
+                )
+            """).format(
+                table=sql.Identifier("tasks"),
+                set_sql=_task_update_set_sql(update_cols),
+                fk=sql.Identifier(task_fk_col),
+            )
+
+        query = sql.SQL("""
+            WITH data AS (
+                SELECT * FROM unnest({arrays}) AS d({cols})
+            ), missing AS (
+                SELECT DISTINCT d.{fk} AS task_id
+                FROM data d
+                WHERE NOT EXISTS (SELECT 1 FROM {tasks} t WHERE t.id = d.{fk})
+            ), ins AS (
+                INSERT INTO {table} ({cols})
+                SELECT {cols} FROM data
+                WHERE NOT EXISTS (SELECT 1 FROM missing)
+                RETURNING {returning}
+            ){update_cte}
+            SELECT
+              (SELECT array_agg(task_id) FROM missing) AS missing_task_ids,
+              (SELECT count(*) FROM ins) AS saved,
+              {items} AS items;
+        """).format(
+            arrays=sql.SQL(", ").join(
+                sql.SQL("{}::{}[]").format(sql.Placeholder(c), sql.Identifier(udt)) for c, udt in typed_cols
+            ),
+            cols=sql.SQL(", ").join(sql.Identifier(c) for c, _ in typed_cols),
+            fk=sql.Identifier(task_fk_col),
+            tasks=sql.Identifier("tasks"),
+            table=sql.Identifier("task_responses"),
+            returning=sql.SQL(", ").join(sql.Identifier(c) for c in returning_cols) if returning_cols else sql.SQL("1"),
+            update_cte=update_cte,
+            items=sql.SQL("(SELECT coalesce(json_agg(ins), '[]') FROM ins)") if returning_cols else sql.SQL("'[]'::json"),
+        ).as_string(None)
+        _QUERY_CACHE[key] = query
+    return query
+
+
 @app.post("/task-responses")
-def create_task_response(payload: TaskResponseIn = Body(...)) -> Dict[str, Any]:
+async def create_task_response(payload: TaskResponseIn = Body(...)) -> Dict[str, Any]:
     """Persist a task response in Postgres.
 
     Defensive behavior:
-    - Validates UUIDs where provided
+    - UUIDs are validated by TaskResponseIn (malformed ones get a 422)
     - Inserts only into columns that actually exist
     - Detects required NOT NULL columns without defaults and fails with 400
     - Avoids writing task.status when it's USER-DEFINED (enum) to prevent constraint errors
     """
-    # Validate UUID-ish inputs (do not trust client).
-    if not _is_uuid(payload.task_id):
-        return _err("invalid_task_id", "task_id must be a UUID", task_id=payload.task_id)
-
-    if payload.user_id and not _is_uuid(payload.user_id):
-        return _err("invalid_user_id", "user_id must be a UUID", user_id=payload.user_id)
-
     try:
-        with _db() as conn:
+        async with _db() as conn:
             # Ensure required tables exist by checking columns.
-            tr_meta = _table_column_meta(conn, "task_responses")
+            metas = await _table_column_meta_multi(conn, [("public", "task_responses"), ("public", "tasks")])
+            tr_meta = metas[("public", "task_responses")]
             if not tr_meta:
                 return _err("missing_table", "Table public.task_responses not found or has no columns")
 
-            t_meta = _table_column_meta(conn, "tasks")
+            t_meta = metas[("public", "tasks")]
             if not t_meta:
                 return _err("missing_table", "Table public.tasks not found or has no columns")
 
-            tr_cols = set(tr_meta.keys())
-            t_cols = set(t_meta.keys())
-
             # Identify column names in task_responses.
-            task_fk_col = _pick_first(tr_cols, ["task_id", "tasks_id", "task_uuid"])
-            if not task_fk_col:
-                return _err("schema_mismatch", "task_responses missing task FK column (expected task_id-like)", columns=sorted(tr_cols))
-
-            responder_col = _pick_first(tr_cols, ["user_id", "responder_user_id", "created_by_user_id", "created_by", "owner_user_id"])
-            text_col = _pick_first(tr_cols, ["response_text", "text", "comment", "response", "answer_text"])
-            type_col = _pick_first(tr_cols, ["response_type", "type"])
-            bool_col = _pick_first(tr_cols, ["value_bool", "bool_value", "response_bool"])
-            num_col = _pick_first(tr_cols, ["value_number", "number_value", "response_number"])
-
-            insert_data: Dict[str, Any] = {task_fk_col: payload.task_id}
+            tr_columns = _task_response_columns(tr_meta)
+            if not tr_columns.col_map["task_id"]:
+                return _err("schema_mismatch", "task_responses missing task FK column (expected task_id-like)", columns=sorted(tr_meta))
 
-            if responder_col and payload.user_id:
-                insert_data[responder_col] = payload.user_id
-
-            if text_col and payload.response_text is not None:
-                insert_data[text_col] = payload.response_text
-
-            if type_col and payload.response_type is not None:
-                insert_data[type_col] = payload.response_type
-
-            if bool_col and payload.value_bool is not None:
-                insert_data[bool_col] = payload.value_bool
-
-            if num_col and payload.value_number is not None:
-                insert_data[num_col] = payload.value_number
+            insert_data = _task_response_row(payload, tr_columns.col_map)
 
             # Check required NOT NULL columns that we did not populate and that have no defaults.
-            missing = _missing_required_columns(tr_meta, set(insert_data.keys()))
-            # But allow common autogenerated columns even if metadata looks strict.
-            # (Some schemas use generated columns or triggers not visible as defaults.)
-            allowlist = {"id", "created_at", "updated_at"}
-            missing = [c for c in missing if c not in allowlist]
+            missing = _missing_insert_columns(tr_columns, insert_data)
             if missing:
                 return _err(
                     "missing_required_fields",
                     "task_responses has required columns without defaults that were not provided",
                     missing_columns=missing,
                     provided_columns=sorted(insert_data.keys()),
-                    available_columns=sorted(tr_cols),
+                    available_columns=sorted(tr_meta),
                 )
 
             # Confirm task exists.
-            if "id" not in t_cols:
-                return _err("schema_mismatch", "tasks table missing id column", tasks_columns=sorted(t_cols))
+            if "id" not in t_meta:
+                return _err("schema_mismatch", "tasks table missing id column", tasks_columns=sorted(t_meta))
 
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT 1 FROM tasks WHERE id = %(task_id)s LIMIT 1;",
-                    {"task_id": payload.task_id},
-                )
-                if cur.fetchone() is None:
-                    return _err("task_not_found", "No task found for task_id", task_id=payload.task_id)
+            update_cols = _task_update_cols(t_meta)
 
-            # Insert task response.
-            insert_cols = list(insert_data.keys())
-            insert_sql_cols = sql.SQL(", ").join(sql.Identifier(c) for c in insert_cols)
-            insert_sql_vals = sql.SQL(", ").join(sql.Placeholder(c) for c in insert_cols)
+            # Existence check, insert and task update run as one statement (one
+            # round trip): the insert and update only see rows when the task exists.
+            # Pipelining three separate statements would also take one round trip,
+            # but the insert could only depend on the check inside an explicit
+            # transaction, and the server would parse three statements, not one.
+            stmt = _task_response_query(tuple(insert_data.keys()), tr_columns.returning, update_cols)
 
-            returning_cols = [c for c in ["id", "task_id", "created_at"] if c in tr_cols]
-            returning_sql = sql.SQL(", ").join(sql.Identifier(c) for c in returning_cols) if returning_cols else sql.SQL("")
+            params = dict(insert_data)
+            params["task_id"] = str(payload.task_id)
 
-            insert_stmt = sql.SQL("""
-                INSERT INTO {table} ({cols})
-                VALUES ({vals})
-                {returning};
-            """).format(
-                table=sql.Identifier("task_responses"),
-                cols=insert_sql_cols,
-                vals=insert_sql_vals,
-                returning=sql.SQL("RETURNING ") + returning_sql if returning_cols else sql.SQL(""),
-            )
+            cur = await conn.execute(stmt, params, prepare=PREPARE_STATEMENTS)
+            out_row = await cur.fetchone()
 
-            out_row: Dict[str, Any] = {}
-            with conn.cursor() as cur:
-                cur.execute(insert_stmt, insert_data)
-                if returning_cols:
-                    rec = cur.fetchone()
-                    if rec is not None:
-                        out_row = dict(zip(returning_cols, rec))
-
-            # Best-effort task update (defensive): set responded_at if present.
-            update_fields: Dict[str, Any] = {}
-            if "responded_at" in t_cols:
-                update_fields["responded_at"] = datetime.utcnow()
-
-            # Only set status if it's not USER-DEFINED (enum-like).
-            if "status" in t_cols:
-                status_meta = t_meta.get("status") or {}
-                if status_meta.get("data_type") != "USER-DEFINED":
-                    update_fields["status"] = "responded"
-
-            if update_fields:
-                set_sql = sql.SQL(", ").join(
-                    sql.SQL("{col} = {ph}").format(col=sql.Identifier(k), ph=sql.Placeholder(k))
-                    for k in update_fields.keys()
-                )
-                update_stmt = sql.SQL("UPDATE {table} SET {set_sql} WHERE id = %(task_id)s;").format(
-                    table=sql.Identifier("tasks"),
-                    set_sql=set_sql,
-                )
-                params = dict(update_fields)
-                params["task_id"] = payload.task_id
-                with conn.cursor() as cur:
-                    cur.execute(update_stmt, params)
+        # The connection is already back in the pool: with autocommit the CTE
+        # committed on execute, so nothing below holds it.
+        if not out_row.pop("task_found"):
+            return _err("task_not_found", "No task found for task_id", task_id=payload.task_id)
 
-            # All good.
-            return {"status": "saved", "task_id": payload.task_id, **out_row}
+        # All good. Task status changed, so drop cached list responses.
+        _RESPONSE_CACHE.clear()
+        return ORJSONResponse({"status": "saved", "task_id": payload.task_id, **out_row})
 
     except Exception as e:
         return _err("task_response_create_failed", str(e))
 
 
+@app.post("/task-responses/bulk")
+async def create_task_responses_bulk(payloads: List[TaskResponseIn] = Body(...)) -> Dict[str, Any]:
+    """Persist many task responses (all-or-nothing).
+
+    Same column mapping and checks as POST /task-responses. Items are grouped
+    by the columns they populate, so a field an item leaves out gets the column
+    default rather than a NULL. Each group is one statement: every column is
+    shipped as one array parameter and expanded with unnest(), so the insert
+    and the tasks update cost one round trip regardless of group size. Several
+    groups share a transaction. If any task_id is unknown, nothing is written
+    and the missing ids are returned.
+
+    This beats executemany() (one statement per row, even pipelined) and COPY
+    (which can't check tasks or update them in the same statement) at these
+    batch sizes.
+    """
+    if not payloads:
+        return _err("empty_batch", "Provide at least one task response")
+    if len(payloads) > BULK_MAX_RESPONSES:
+        return _err("batch_too_large", f"At most {BULK_MAX_RESPONSES} task responses per call", count=len(payloads))
+
+    try:
+        async with _db() as conn:
+            metas = await _table_column_meta_multi(conn, [("public", "task_responses"), ("public", "tasks")])
+            tr_meta = metas[("public", "task_responses")]
+            if not tr_meta:
+                return _err("missing_table", "Table public.task_responses not found or has no columns")
+
+            t_meta = metas[("public", "tasks")]
+            if not t_meta:
+                return _err("missing_table", "Table public.tasks not found or has no columns")
+
+            if "id" not in t_meta:
+                return _err("schema_mismatch", "tasks table missing id column", tasks_columns=sorted(t_meta))
+
+            tr_columns = _task_response_columns(tr_meta)
+            task_fk_col = tr_columns.col_map["task_id"]
+            if not task_fk_col:
+                return _err("schema_mismatch", "task_responses missing task FK column (expected task_id-like)", columns=sorted(tr_meta))
+
+            rows = [_task_response_row(p, tr_columns.col_map) for p in payloads]
+            for i, row in enumerate(rows):
+                missing = _missing_insert_columns(tr_columns, row)
+                if missing:
+                    return _err(
+                        "missing_required_fields",
+                        "task_responses has required columns without defaults that were not provided",
+                        index=i,
+                        missing_columns=missing,
+                        provided_columns=sorted(row.keys()),
+                    )
+
+            # One group per set of populated columns (usually just one).
+            shapes: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+            for row in rows:
+                shapes.setdefault(tuple(row), []).append(row)
+            update_cols = _task_update_cols(t_meta)
+
+            missing_task_ids: List[Any] = []
+            saved = 0
+            items: List[Any] = []
+            async with AsyncExitStack() as stack:
+                # A single statement is atomic on its own; only several need BEGIN/COMMIT.
+                if len(shapes) > 1:
+                    await stack.enter_async_context(conn.transaction())
+
+                for insert_cols, shape_rows in shapes.items():
+                    params: Dict[str, Any] = {c: [row[c] for row in shape_rows] for c in insert_cols}
+                    stmt = _task_responses_bulk_query(
+                        tuple((c, tr_meta[c]["udt_name"]) for c in insert_cols),
+                        task_fk_col,
+                        tr_columns.returning,
+                        update_cols,
+                    )
+                    cur = await conn.execute(stmt, params, prepare=PREPARE_STATEMENTS)
+                    out = await cur.fetchone()
+                    missing_task_ids += out["missing_task_ids"] or []
+                    saved += out["saved"]
+                    items += out["items"]
+
+                # Groups without unknown tasks did write; undo them too.
+                if missing_task_ids and len(shapes) > 1:
+                    raise psycopg.Rollback()
+
+        if missing_task_ids:
+            return _err(
+                "task_not_found",
+                "No task found for some task_ids; nothing was saved",
+                missing_task_ids=sorted({str(t) for t in missing_task_ids}),
+            )
+
+        _RESPONSE_CACHE.clear()
+        return ORJSONResponse({"status": "saved", "count": saved, "items": items})
+
+    except Exception as e:
+        return _err("task_responses_bulk_failed", str(e))
+
+
+async def _dispatch_batch_item(item: BatchRequestItem) -> Dict[str, Any]:
+    """Run one sub-request through the ASGI app in-process (no HTTP hop)."""
+    parts = urlsplit(item.url)
+    if parts.path == "/batch":
+        return {"id": item.id, "status": 400, "body": _err("nested_batch", "/batch cannot be called from a batch")}
+
+    body = b"" if item.body is None else orjson.dumps(item.body)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": item.method.upper(),
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")] if item.body is not None else [],
+        "client": None,
+        "server": None,
+    }
+    body_sent = False
+    done = asyncio.Event()
+    status = 500
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        return {"id": item.id, "status": 500, "body": _err("batch_item_failed", str(e))}
+    finally:
+        done.set()
+
+    raw = b"".join(chunks)
+    try:
+        out: Any = orjson.loads(raw) if raw else None
+    except orjson.JSONDecodeError:
+        out = raw.decode("utf-8", "replace")
+    return {"id": item.id, "status": status, "body": out}
+
+
+@app.post("/batch")
+async def batch(payload: BatchIn = Body(...)) -> Dict[str, Any]:
+    """Run several API calls in one round trip; sub-requests execute concurrently.
+
+    Request:  {"requests": [{"id", "url", "method", "body"}, ...]}
+    Response: {"responses": [{"id", "status", "body"}, ...]} in request order.
+    """
+    responses = await asyncio.gather(*(_dispatch_batch_item(item) for item in payload.requests))
+    # Returned as a Response so FastAPI skips jsonable_encoder's recursive walk
+    # over what can be thousands of embedded list rows.
+    return ORJSONResponse({"responses": responses})
+
+
 # ---------------------------------------------------------------------------
 # SELF-TEST BLOCK (runs only when executing this file directly)
 # Usage:
@@ -468,15 +1126,15 @@ def create_task_response(payload: TaskResponseIn = Body(...)) -> Dict[str, Any]:
 #   0 = OK, 1 = failure
 # ---------------------------------------------------------------------------
 
-def _self_test() -> int:
+async def _self_test() -> int:
     """Basic runtime safety checks for DB connectivity and required tables."""
     if not DATABASE_URL:
         print("SELF-TEST FAIL: DATABASE_URL not set")
         return 1
     try:
-        with _db() as conn:
+        async with POOL, _db() as conn:
             for tbl in ["tasks", "task_responses"]:
-                cols = _table_columns(conn, tbl)
+                cols = await _table_columns(conn, tbl)
                 if not cols:
                     print(f"SELF-TEST FAIL: table {tbl} missing or has no columns")
                     return 1
@@ -488,4 +1146,4 @@ def _self_test() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(_self_test())
+    raise SystemExit(asyncio.run(_self_test()))
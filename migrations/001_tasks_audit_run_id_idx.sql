@@ -0,0 +1,8 @@
+-- Index the tasks -> audit_runs foreign key.
+--
+-- /tasks?audit_run_id=... filters on it, and the account_id filter joins
+-- tasks to audit_runs through it. Postgres does not index FK columns on its
+-- own, so without this every per-run lookup is a sequential scan of tasks.
+--
+-- CONCURRENTLY avoids locking writes on tasks; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_audit_run_id ON tasks (audit_run_id);
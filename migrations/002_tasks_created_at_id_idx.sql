@@ -0,0 +1,8 @@
+-- Keyset pagination for /tasks.
+--
+-- /tasks orders by (created_at DESC, id DESC) and resumes pages with
+-- (t.created_at, t.id) < (cursor_created_at, cursor_id). This index turns
+-- both into an index range scan, whatever the page depth.
+--
+-- CONCURRENTLY avoids locking writes on tasks; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_created_at_id ON tasks (created_at DESC, id DESC);
@@ -0,0 +1,23 @@
+-- Covering indexes for the list endpoints.
+--
+-- CONCURRENTLY and VACUUM both refuse to run inside a transaction block; run
+-- this file outside a transaction.
+--
+-- /audit-runs: WHERE account_id = ? ORDER BY created_at DESC LIMIT n, selecting
+-- id, account_id, template_id, status, started_at, due_at, created_at. Every
+-- selected column is in the index, so this is an index-only scan (no heap).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_runs_account_created
+    ON audit_runs (account_id, created_at DESC)
+    INCLUDE (id, template_id, status, started_at, due_at);
+
+-- /tasks: WHERE audit_run_id = ? [AND status = ?] ORDER BY created_at DESC, id DESC.
+-- id is part of the key to match the keyset sort order. /tasks also selects
+-- description (wide text, deliberately not indexed), so its rows need a heap
+-- fetch either way: the index removes the sort and the filter scan, and carries
+-- no INCLUDE columns, which would only add write cost on every task update.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_run_status_created
+    ON tasks (audit_run_id, status, created_at DESC, id DESC);
+
+-- Index-only scans depend on an up-to-date visibility map.
+VACUUM ANALYZE audit_runs;
+VACUUM ANALYZE tasks;
@@ -0,0 +1,31 @@
+-- Ordered indexes for the list filters 003 does not cover.
+--
+-- Each filter below is an equality on the leading key column, so the rest of
+-- the key already matches ORDER BY created_at DESC, id DESC: Postgres walks the
+-- index and stops after LIMIT rows instead of sorting every match. /tasks also
+-- selects description, which (as in 003) no tasks index carries, so its rows
+-- still take a heap fetch; only /audit-runs gets an index-only scan. The tasks
+-- indexes therefore carry no INCLUDE columns, which would only add write cost.
+--
+-- CONCURRENTLY avoids locking writes; run outside a transaction.
+
+-- /tasks?audit_run_id=... without status. 003 leads with (audit_run_id, status),
+-- which groups rows by status, so this shape still needed a sort.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_run_created
+    ON tasks (audit_run_id, created_at DESC, id DESC);
+
+-- 001's single-column index is a pure prefix of the one above. tasks is updated
+-- on every task response, so each redundant index is write cost for nothing.
+DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_audit_run_id;
+
+-- /tasks?status=... across all runs.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_status_created
+    ON tasks (status, created_at DESC, id DESC);
+
+-- /audit-runs without account_id: ORDER BY created_at DESC LIMIT n, index-only.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_runs_created
+    ON audit_runs (created_at DESC)
+    INCLUDE (id, account_id, template_id, status, started_at, due_at);
+
+ANALYZE audit_runs;
+ANALYZE tasks;